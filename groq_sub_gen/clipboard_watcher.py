@@ -0,0 +1,215 @@
+"""
+Clipboard change notifications.
+
+Each platform backend exposes a blocking `wait()` that returns once the clipboard (probably) changed, so
+the watcher only reads the clipboard text when there is something new instead of every second.
+"""
+import asyncio
+import ctypes
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pyperclip
+
+
+class _PollingClipboardListener:
+    """
+    Fallback when no change notification is available: waits before the next paste, polling quickly right
+    after a change and backing off to `max_interval` the longer the clipboard stays the same.
+    """
+
+    def __init__(self, min_interval=0.1, max_interval=5.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._last_change = time.monotonic()
+
+    def changed(self):
+        self._last_change = time.monotonic()
+
+    def wait(self):
+        idle = time.monotonic() - self._last_change
+        time.sleep(min(self.max_interval, max(self.min_interval, idle * 0.1)))
+
+
+class _Win32ClipboardListener:
+    """Blocks on WM_CLIPBOARDUPDATE messages sent to a hidden message-only window."""
+    WM_CLIPBOARDUPDATE = 0x031D
+    HWND_MESSAGE = -3
+    QS_ALLINPUT = 0x04FF
+    PM_REMOVE = 0x0001
+
+    def __init__(self):
+        from ctypes import wintypes
+        self._user32 = user32 = ctypes.WinDLL('user32', use_last_error=True)
+        user32.CreateWindowExW.restype = wintypes.HWND
+        user32.CreateWindowExW.argtypes = [
+            wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+        ]
+        user32.AddClipboardFormatListener.argtypes = [wintypes.HWND]
+        user32.PeekMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT, wintypes.UINT]
+        user32.DispatchMessageW.argtypes = [ctypes.POINTER(wintypes.MSG)]
+        user32.MsgWaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.c_void_p, wintypes.BOOL, wintypes.DWORD, wintypes.DWORD]
+        self._hwnd = user32.CreateWindowExW(0, "STATIC", None, 0, 0, 0, 0, 0, self.HWND_MESSAGE, None, None, None)
+        if not self._hwnd or not user32.AddClipboardFormatListener(self._hwnd):
+            raise ctypes.WinError(ctypes.get_last_error())
+        self._msg = wintypes.MSG()
+
+    def wait(self):
+        while True:
+            # Wake up periodically so Ctrl+C is still handled while idle.
+            self._user32.MsgWaitForMultipleObjects(0, None, False, 500, self.QS_ALLINPUT)
+            changed = False
+            while self._user32.PeekMessageW(ctypes.byref(self._msg), None, 0, 0, self.PM_REMOVE):
+                if self._msg.message == self.WM_CLIPBOARDUPDATE:
+                    changed = True
+                else:
+                    self._user32.DispatchMessageW(ctypes.byref(self._msg))
+            if changed:
+                return
+
+
+class _MacClipboardListener:
+    """Compares NSPasteboard's change counter, which is far cheaper than reading the clipboard text."""
+
+    def __init__(self, interval=0.2):
+        from AppKit import NSPasteboard
+        self.interval = interval
+        self._pasteboard = NSPasteboard.generalPasteboard()
+        self._change_count = self._pasteboard.changeCount()
+
+    def wait(self):
+        while (change_count := self._pasteboard.changeCount()) == self._change_count:
+            time.sleep(self.interval)
+        self._change_count = change_count
+
+
+class _X11ClipboardListener:
+    """Blocks on XFixes selection-owner notifications for CLIPBOARD. Needs the optional `python-xlib` package."""
+
+    def __init__(self):
+        from Xlib import display
+        from Xlib.ext import xfixes
+        self._display = display.Display()
+        if not self._display.has_extension('XFIXES'):
+            raise RuntimeError("X server has no XFIXES extension")
+        self._display.xfixes_query_version()
+        self._display.screen().root.xfixes_select_selection_input(
+            self._display.get_atom('CLIPBOARD'), xfixes.XFixesSetSelectionOwnerNotifyMask,
+        )
+
+    def wait(self):
+        while True:
+            event = self._display.next_event()
+            if (event.type, getattr(event, 'sub_code', None)) == self._display.extension_event.SetSelectionOwnerNotify:
+                return
+
+
+class _WaylandClipboardListener:
+    """Reads the line `wl-paste --watch echo` prints for every clipboard change. Needs wl-clipboard."""
+
+    def __init__(self):
+        self._process = subprocess.Popen(
+            ["wl-paste", "--watch", "echo"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+    def wait(self):
+        if not self._process.stdout.readline():
+            raise RuntimeError(f"wl-paste --watch exited with code {self._process.wait()}")
+
+
+def _create_clipboard_listener():
+    try:
+        if sys.platform == 'win32':
+            return _Win32ClipboardListener()
+        if sys.platform == 'darwin':
+            return _MacClipboardListener()
+        if sys.platform.startswith('linux'):
+            if os.environ.get('WAYLAND_DISPLAY') and shutil.which("wl-paste"):
+                return _WaylandClipboardListener()
+            if os.environ.get('DISPLAY'):
+                return _X11ClipboardListener()
+    except Exception as e:
+        logging.warning(f"Clipboard change notifications unavailable, falling back to polling: {e}")
+    return _PollingClipboardListener()
+
+
+def changes(error_retry_interval=5.0):
+    """Blocking generator of the clipboard text, yielded at startup and then every time it changes."""
+    listener = None
+    previous_content = ""
+    while True:
+        try:
+            if listener is None:
+                listener = _create_clipboard_listener()
+            else:
+                listener.wait()
+            content = pyperclip.paste()
+        except pyperclip.PyperclipException as clip_err:
+            logging.warning(f"Could not access clipboard: {clip_err}. Retrying...")
+            time.sleep(error_retry_interval)
+            continue
+        except RuntimeError as listener_err:
+            logging.warning(f"Clipboard listener stopped, falling back to polling: {listener_err}")
+            listener = _PollingClipboardListener()
+            continue
+        except Exception as listener_err:
+            logging.error(f"Error watching the clipboard: {listener_err}. Retrying...", exc_info=True)
+            time.sleep(error_retry_interval)
+            # The listener may be left broken (e.g. a closed X connection), so start over with a new one.
+            listener = None
+            continue
+        if content and content != previous_content:
+            previous_content = content
+            if hasattr(listener, 'changed'):
+                listener.changed()
+            yield content
+
+
+class ClipboardWatcher:
+    """
+    Async version of `changes()`.
+
+    The platform listener blocks, so it runs on its own daemon thread (Win32 also requires the listener to
+    be used from the thread that created it) and hands new text to the event loop through a queue.
+    Use as `async for text in ClipboardWatcher(): ...` or `await watcher.next_clipboard()`.
+    """
+
+    def __init__(self, error_retry_interval=5.0):
+        self.error_retry_interval = error_retry_interval
+        self._queue = None
+        self._thread = None
+
+    def _run(self, loop):
+        try:
+            for content in changes(self.error_retry_interval):
+                loop.call_soon_threadsafe(self._queue.put_nowait, content)
+        except BaseException as e:
+            # Hand the error to the waiting coroutine, no more clipboard text is coming on this thread.
+            try:
+                loop.call_soon_threadsafe(self._queue.put_nowait, e)
+            except RuntimeError:
+                pass  # The event loop already closed.
+
+    async def next_clipboard(self):
+        if self._thread is None:
+            self._queue = asyncio.Queue()
+            self._thread = threading.Thread(target=self._run, args=(asyncio.get_running_loop(),), daemon=True)
+            self._thread.start()
+        content = await self._queue.get()
+        if isinstance(content, BaseException):
+            raise content
+        return content
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.next_clipboard()
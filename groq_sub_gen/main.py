@@ -1,4 +1,7 @@
 import asyncio
+import functools
+import os
+import shutil
 import subprocess
 from pathlib import Path
 
@@ -7,6 +10,7 @@ import asbplayer
 from groq_sub_gen import watcher
 from groq_sub_gen.shared import config
 
+@functools.lru_cache(maxsize=1)
 def _asb_websocket_server_dir() -> Path:
     module_file = getattr(asbplayer, "__file__", None)
     if module_file:
@@ -30,43 +34,90 @@ def _asb_websocket_server_dir() -> Path:
         "Rebuild/install the package so asbplayer assets are included."
     )
 
+# The server runs for the whole session, so its output goes to a file; an unread PIPE would fill up and
+# eventually block it. The previous run's log is kept next to it.
+ASB_WSS_LOG = Path("asb_wss.log")
+
+def _open_asb_wss_log():
+    """Returns (file, path) for the server's output. path is None if no log file could be opened."""
+    try:
+        os.replace(ASB_WSS_LOG, ASB_WSS_LOG.with_name(ASB_WSS_LOG.name + ".1"))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # On Windows the log is locked while a server from an earlier session is still running.
+        print(f"Could not rotate {ASB_WSS_LOG}: {e}")
+    for log_path in (ASB_WSS_LOG, ASB_WSS_LOG.with_name(f"{ASB_WSS_LOG.stem}.{os.getpid()}{ASB_WSS_LOG.suffix}")):
+        try:
+            return open(log_path, "wb"), log_path
+        except OSError as e:
+            print(f"Could not open {log_path}: {e}")
+    return open(os.devnull, "wb"), None
+
 async def run_asb_websocket_go_server_nonblocking():
     server_dir = _asb_websocket_server_dir()
-    process = await asyncio.create_subprocess_exec(
-        "go", "run", "main.go",
-        cwd=str(server_dir),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    print("asbplayer WebSocket server started in the background.")
+    log_file, log_path = _open_asb_wss_log()
+    with log_file:
+        process = await asyncio.create_subprocess_exec(
+            "go", "run", "main.go",
+            cwd=str(server_dir),
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT
+        )
+    if log_path:
+        print(f"asbplayer WebSocket server started in the background. Logging to {log_path.resolve()}")
+    else:
+        print("asbplayer WebSocket server started in the background. Its output is discarded.")
     return process
 
 async def monitor_process(process):
-    stdout, stderr = await process.communicate()
+    await process.wait()
     if process.returncode == 0:
         print("asbplayer WebSocket server finished successfully.")
     else:
-        print(f"asbplayer WebSocket server exited with error code {process.returncode}:")
-        if stdout:
-            print(f"Stdout: {stdout.decode()}")
-        if stderr:
-            print(f"Stderr: {stderr.decode()}")
+        print(f"asbplayer WebSocket server exited with error code {process.returncode}, see {ASB_WSS_LOG.resolve()}")
 
+# "<go path>:<go binary mtime>" on the first line, `go version` output on the second.
+_GO_CHECK_CACHE = Path.home() / ".cache" / "groq_sub_gen" / "go_ok"
+
+@functools.lru_cache(maxsize=1)
 def is_go_installed():
-    try:
-        result = subprocess.run(["go", "version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, text=True)
-        print(f"Go is installed: {result.stdout.strip()}")
-        return True
-    except FileNotFoundError:
+    go_path = shutil.which("go")
+    if go_path is None:
         print("Go is not installed or not in PATH. Install it Here: https://go.dev/doc/install")
         raise FileNotFoundError("Go is not installed or not in PATH.")
+
+    # Skip running `go version` when this exact binary already passed the check on a previous run.
+    cache_key = f"{go_path}:{os.stat(go_path).st_mtime_ns}"
+    try:
+        cached_key, cached_version = _GO_CHECK_CACHE.read_text(encoding="utf-8").split("\n", 1)
+        if cached_key == cache_key:
+            print(f"Go is installed: {cached_version}")
+            return True
+    except (OSError, ValueError):
+        pass
+
+    try:
+        result = subprocess.run([go_path, "version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, text=True)
     except subprocess.CalledProcessError as e:
         print(f"Error while checking Go installation: {e.stderr.strip()}")
         return False
+    version = result.stdout.strip()
+    print(f"Go is installed: {version}")
+    try:
+        _GO_CHECK_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        _GO_CHECK_CACHE.write_text(f"{cache_key}\n{version}", encoding="utf-8")
+    except OSError:
+        pass
+    return True
 
 async def async_main():
     print("Checking for Go installation...")
-    if config.RUN_ASB_WEBSOCKET_SERVER and is_go_installed():
+    # Both checks may spawn a subprocess, run them side by side instead of one after the other.
+    go_check = asyncio.to_thread(is_go_installed) if config.RUN_ASB_WEBSOCKET_SERVER else asyncio.sleep(0, result=False)
+    go_installed, _ = await asyncio.gather(go_check, watcher.check_ffmpeg())
+    if go_installed:
         asbplayer_wss = await run_asb_websocket_go_server_nonblocking()
         
     print("Starting Groq Sub Gen...")
@@ -76,7 +127,10 @@ async def async_main():
     print("Exiting Groq Sub Gen")
 
 def main():
-    asyncio.run(async_main())
+    try:
+        asyncio.run(async_main())
+    except KeyboardInterrupt:
+        print("Exiting Groq Sub Gen")
 
 if __name__ == '__main__':
     main()
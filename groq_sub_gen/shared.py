@@ -1,16 +1,28 @@
 import json
-import base64
+import binascii
+import functools
+import http.client
 import logging
 import os
 import re
+import shutil
 import subprocess
+import sys
 import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
-import requests
 import yaml
 import yt_dlp
 from dataclasses_json import dataclass_json
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from groq_sub_gen.constants import ALLOWED_FILE_EXTENSIONS, LANGUAGE_FROM_CODE
+
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
 
 # --- Custom Exception ---
 
@@ -20,67 +32,137 @@ class SubtitleError(Exception):
     pass
 
 
+class _NewFileHandler(FileSystemEventHandler):
+    def __init__(self, on_new_file):
+        self.on_new_file = on_new_file
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.on_new_file(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.on_new_file(event.dest_path)
+
+
 class DirectoryWatcher(threading.Thread):
-    def __init__(self, directory, callback):
+    """Calls `callback(path)` for every file created in or moved into `directory`, using OS file events."""
+
+    def __init__(self, directory, callback, poll_interval=1.0):
         super().__init__()
         self.directory = directory
         self.callback = callback
-        self.running = True
+        # Only used if the OS file watcher can't be started (e.g. inotify watch limit reached).
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def _on_new_file(self, full_path):
+        logging.info(f"New file detected: {os.path.basename(full_path)}")
+        self.callback(full_path)
 
     def run(self):
         logging.info(f"Starting directory watcher for {self.directory}")
-        initial_files = set(os.listdir(self.directory))
-        while self.running:
-            current_files = set(os.listdir(self.directory))
-            new_files = current_files - initial_files
-            if new_files:
-                for new_file in new_files:
-                    full_path = os.path.join(self.directory, new_file)
-                    if os.path.isfile(full_path):
-                        logging.info(f"New file detected: {new_file}")
-                        self.callback(full_path)
-            initial_files = current_files
+        observer = Observer()
+        observer.schedule(_NewFileHandler(self._on_new_file), self.directory, recursive=False)
+        try:
+            observer.start()
+        except OSError as e:
+            logging.warning(f"File system events unavailable for {self.directory}, polling instead: {e}")
+            self._poll()
+            return
+        try:
+            self._stop_event.wait()
+        finally:
+            observer.stop()
+            observer.join()
+
+    def _list_files(self):
+        with os.scandir(self.directory) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+
+    def _poll(self):
+        known_files = self._list_files()
+        while not self._stop_event.wait(self.poll_interval):
+            current_files = self._list_files()
+            for new_file in current_files - known_files:
+                self._on_new_file(os.path.join(self.directory, new_file))
+            known_files = current_files
 
     def stop(self):
-        self.running = False
+        self._stop_event.set()
         logging.info("Stopping directory watcher")
 
 
+# Kept open across calls so every subtitle POST reuses the same socket to the local websocket server.
+_ASB_CONNECTION = http.client.HTTPConnection("127.0.0.1", 8766, timeout=30)
+_ASB_CONNECTION_LOCK = threading.Lock()
+_ASB_LOAD_SUBTITLES_PATH = "/asbplayer/load-subtitles"
+
+
+# Multiple of 3, so every chunk base64-encodes without padding except the last.
+_BASE64_READ_SIZE = 3 * 16 * 1024
+# NUL can't appear in a file name, so its JSON form only ever matches the placeholder.
+_BASE64_PLACEHOLDER = json.dumps("\0")
+
+
+def _stream_base64_json(f, filename):
+    """
+    Yields `{"files": [{"name": filename, "base64": ...}]}` piece by piece, base64-encoding `f` as it is
+    read instead of holding the file, its encoding and the JSON string in memory all at once.
+    """
+    prefix, suffix = json.dumps({"files": [{"name": filename, "base64": "\0"}]}).split(_BASE64_PLACEHOLDER)
+    yield prefix.encode('utf-8') + b'"'
+    while chunk := f.read(_BASE64_READ_SIZE):
+        yield binascii.b2a_base64(chunk, newline=False)
+    yield b'"' + suffix.encode('utf-8')
+
+
+def _post_subtitles(srt_file_path, filename):
+    """POSTs the SRT on the shared connection, reconnecting once if the server dropped the idle socket."""
+    with _ASB_CONNECTION_LOCK:
+        for attempt in range(2):
+            try:
+                with open(srt_file_path, 'rb') as f:
+                    _ASB_CONNECTION.request(
+                        "POST", _ASB_LOAD_SUBTITLES_PATH, body=_stream_base64_json(f, filename),
+                        headers={"Content-Type": "application/json"},
+                    )
+                response = _ASB_CONNECTION.getresponse()
+                return response.status, response.read().decode('utf-8', 'replace')
+            except (http.client.HTTPException, ConnectionError):
+                _ASB_CONNECTION.close()
+                if attempt:
+                    raise
+
+
 def send_subtitles_http(srt_file_path):
     """
-    Reads an SRT file, encodes it to Base64, and sends it to an HTTP endpoint using requests.
+    Streams an SRT file, Base64-encoded, to the asbplayer HTTP endpoint.
 
     Args:
         srt_file_path (str): The path to the generated SRT file.
     """
-    http_url = "http://127.0.0.1:8766/asbplayer/load-subtitles"
-    if not os.path.exists(srt_file_path):
-        logging.error(f"SRT file does not exist: {srt_file_path}")
-        return
+    http_url = f"http://{_ASB_CONNECTION.host}:{_ASB_CONNECTION.port}{_ASB_LOAD_SUBTITLES_PATH}"
     try:
-        with open(srt_file_path, 'rb') as f:
-            srt_content_bytes = f.read()
-        base64_srt = base64.b64encode(srt_content_bytes).decode('utf-8')
         filename = os.path.basename(srt_file_path)
-        post_data = {"files": [{"name": filename, "base64": base64_srt}]}
-        response = requests.post(http_url, json=post_data)
-        if response.status_code == 200:
+        status, response_text = _post_subtitles(srt_file_path, filename)
+        if status == 200:
             logging.info(
                 f"Successfully sent subtitles in {filename} to {http_url}")
-            logging.debug(f"requests response: {response.text}")
+            logging.debug(f"HTTP response: {response_text}")
         else:
             logging.error(
-                f"Failed to send subtitles to {http_url}. requests returned code: {response.status_code}")
-            logging.error(f"requests response text: {response.text}")
+                f"Failed to send subtitles to {http_url}. Server returned code: {status}")
+            logging.error(f"HTTP response text: {response_text}")
     except FileNotFoundError as e:
-        logging.error(f"SRT file not found: {srt_file_path}")
+        logging.error(f"SRT file does not exist: {srt_file_path}")
     except Exception as e:
         logging.error(
             f"An error occurred while sending subtitles via HTTP: {e}")
 
 
 @dataclass_json
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     process_locally: bool = False
     whisper_model: str = "turbo"
@@ -92,96 +174,190 @@ class Config:
     skip_language_check: bool = False
     # path_to_watch: str = "./watch"
     cookies: str = ""
+    # Size limit of the on-disk subtitle cache for YouTube videos, 0 disables it.
+    srt_cache_max_mb: int = 100
 
-    def __init__(self, process_locally=False, GROQ_API_KEY="", whisper_model="turbo", RUN_ASB_WEBSOCKET_SERVER=True, model="whisper-large-v3-turbo", output_dir="output", language="ja", skip_language_check=False, path_to_watch="./watch", cookies="", *args, **kwargs):
-        self.process_locally = process_locally
-        self.GROQ_API_KEY = GROQ_API_KEY
-        self.whisper_model = whisper_model
-        self.RUN_ASB_WEBSOCKET_SERVER = RUN_ASB_WEBSOCKET_SERVER
-        self.model = model
-        self.output_dir = output_dir
-        self.language = language
-        self.skip_language_check = skip_language_check
-        # self.path_to_watch = path_to_watch
-        self.cookies = cookies
+
+_CONFIG_FIELDS = frozenset(field.name for field in fields(Config))
 
 
 def parse_config(file_path):
     try:
-        with open(file_path, 'r') as file:
-            config = Config(**yaml.safe_load(file))
+        st = os.stat(file_path)
     except FileNotFoundError:
         config = Config()
         with open(file_path, 'w') as file:
-            yaml.safe_dump(config.to_dict(), file)
+            yaml.dump(config.to_dict(), file, Dumper=_YamlDumper)
+        return config
+    return _load_config(file_path, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config(file_path, mtime_ns, size):
+    """Parses the config once per (path, mtime, size); Config is frozen, so callers can share the result."""
+    try:
+        with open(file_path, 'r') as file:
+            config_dict = yaml.load(file, Loader=_YamlLoader)
     except yaml.YAMLError as e:
         logging.error(f"Error parsing YAML file {file_path}: {e}")
         raise
-    return config
+    # Unknown keys (e.g. the retired path_to_watch) are ignored, like the old hand-written __init__ did.
+    return Config(**{key: value for key, value in config_dict.items() if key in _CONFIG_FIELDS})
 
 
 # --- YouTube Functions ---
 
-def download_audio(youtube_url, output_dir="."):
-    """Downloads audio from YouTube URL, returns final audio file path."""
-    logging.info(f"Attempting to download audio from: {youtube_url}")
-    try:
-        with yt_dlp.YoutubeDL({'quiet': True, 'verbose': False, 'skip_download': True}) as ydl:
-            info_dict_pre = ydl.extract_info(youtube_url, download=False)
-            video_id = info_dict_pre.get('id', 'youtube_audio')
-            base_filename = os.path.join(output_dir, video_id)
-            logging.info(f"Video ID detected: {video_id}")
-    except Exception as e:
-        logging.warning(
-            f"Could not pre-extract video ID, using default filename: {e}")
-        base_filename = os.path.join(output_dir, "youtube_audio")
+# Metadata fetched by the language check, kept until download_audio takes it for the same URL so each
+# video is only extracted once. Bounded in case checked videos are never downloaded.
+_INFO_CACHE = {}
+_INFO_CACHE_MAX = 32
+_INFO_CACHE_LOCK = threading.Lock()
 
+
+def _base_ydl_opts():
+    """Options the metadata extraction and the download must agree on."""
     ydl_opts = {
-        'quiet': False,
         'verbose': False,
-        'format': 'bestaudio/best',
-        'outtmpl': f'{base_filename}.%(ext)s',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-        'keepvideo': False,
+        # Applied while extracting, so the info dict the language check caches is already just the one video.
         'noplaylist': True,
     }
-
     if config.cookies:
         ydl_opts['cookiesfrombrowser'] = (config.cookies,)
-    final_audio_path = f"{base_filename}.mp3"
+    return ydl_opts
 
+
+def _info_ydl_opts():
+    return {**_base_ydl_opts(), 'quiet': True}
+
+
+def _download_ydl_opts(output_dir):
+    ydl_opts = {
+        **_base_ydl_opts(),
+        'quiet': False,
+        # Groq and Whisper take YouTube's m4a (AAC) and webm (opus) audio as is, so it is downloaded without
+        # any postprocessing. Anything else is converted after the download, see download_audio.
+        'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best',
+        # yt-dlp names the file after the video ID itself, so no metadata request is needed up front.
+        'outtmpl': os.path.join(output_dir, '%(id)s.%(ext)s'),
+        'keepvideo': False,
+        'concurrent_fragment_downloads': 4,
+    }
+    if shutil.which("aria2c"):
+        ydl_opts['external_downloader'] = 'aria2c'
+    return ydl_opts
+
+
+def _extract_info(url):
+    """Extracts (without downloading) the yt-dlp info dict for a URL and caches it for download_audio."""
+    with yt_dlp.YoutubeDL(_info_ydl_opts()) as ydl:
+        info_dict = ydl.extract_info(url, download=False)
+    with _INFO_CACHE_LOCK:
+        if len(_INFO_CACHE) >= _INFO_CACHE_MAX:
+            del _INFO_CACHE[next(iter(_INFO_CACHE))]
+        _INFO_CACHE[url] = info_dict
+    return info_dict
+
+
+def _convert_audio_to_m4a(path):
+    """Re-encodes a download in a format the transcribers don't accept to AAC in m4a, replacing the original."""
+    logging.info(f"Converting {os.path.basename(path)} to m4a...")
+    output_path = os.path.splitext(path)[0] + '.m4a'
+    # Written under a temporary name and renamed once complete, so an interrupted conversion never leaves a
+    # truncated file under the final name.
+    tmp_path = f"{output_path}.part"
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            logging.info("Starting download and audio extraction...")
-            info_dict = ydl.extract_info(youtube_url, download=True)
-            if os.path.exists(final_audio_path):
-                logging.info(
-                    f"Audio download and conversion successful: {final_audio_path}")
-                return final_audio_path
+        subprocess.run(["ffmpeg", "-y", "-i", path, "-vn", "-c:a", "aac", "-b:a", "192k", "-f", "ipod", tmp_path],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.remove(path)
+    return output_path
+
+
+# Downloads this process made that queued entries still use: video ID -> [path, number of users]. Only these
+# are reused, so the same video queued twice shares one download and nothing else in output_dir is claimed.
+_OWNED_DOWNLOADS = {}
+_OWNED_DOWNLOADS_LOCK = threading.Lock()
+# Held while a video downloads, so a second entry for it waits and then shares the file instead of
+# downloading it again into the same path.
+_VIDEO_DOWNLOAD_LOCKS = {}
+
+
+def _video_download_lock(video_id):
+    with _OWNED_DOWNLOADS_LOCK:
+        return _VIDEO_DOWNLOAD_LOCKS.setdefault(video_id, threading.Lock())
+
+
+def release_downloaded_audio(audio_file_path):
+    """Drops one user of a download_audio file, deleting the file once nothing queued uses it any more."""
+    with _OWNED_DOWNLOADS_LOCK:
+        for video_id, entry in _OWNED_DOWNLOADS.items():
+            if entry[0] == audio_file_path:
+                entry[1] -= 1
+                if entry[1] > 0:
+                    return
+                del _OWNED_DOWNLOADS[video_id]
+                break
+        try:
+            os.remove(audio_file_path)
+            logging.info(f"Cleaned up downloaded audio file: {audio_file_path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not remove downloaded audio file {audio_file_path}: {e}")
+
+
+def download_audio(youtube_url, output_dir="."):
+    """
+    Downloads audio from YouTube URL, returns final audio file path.
+    Every returned path must be handed back to release_downloaded_audio once it has been used.
+    """
+    video_id = youtube_video_id(youtube_url)
+    if not video_id:
+        return _download_audio(youtube_url, output_dir)
+    with _video_download_lock(video_id):
+        with _OWNED_DOWNLOADS_LOCK:
+            entry = _OWNED_DOWNLOADS.get(video_id)
+            if entry and os.path.exists(entry[0]):
+                entry[1] += 1
+                with _INFO_CACHE_LOCK:
+                    _INFO_CACHE.pop(youtube_url, None)
+                logging.info(f"Reusing audio already downloaded for {video_id}: {entry[0]}")
+                return entry[0]
+        audio_file_path = _download_audio(youtube_url, output_dir)
+        if audio_file_path:
+            with _OWNED_DOWNLOADS_LOCK:
+                _OWNED_DOWNLOADS[video_id] = [audio_file_path, 1]
+        return audio_file_path
+
+
+def _download_audio(youtube_url, output_dir):
+    logging.info(f"Attempting to download audio from: {youtube_url}")
+
+    try:
+        logging.info("Starting download and audio extraction...")
+        with _INFO_CACHE_LOCK:
+            info_dict_pre = _INFO_CACHE.pop(youtube_url, None)
+        with yt_dlp.YoutubeDL(_download_ydl_opts(output_dir)) as ydl:
+            if info_dict_pre is not None:
+                # The language check already fetched the metadata, only the download is left.
+                info_dict = ydl.process_ie_result(info_dict_pre, download=True)
             else:
-                downloaded_path = ydl.prepare_filename(info_dict)
-                if downloaded_path and downloaded_path.endswith('.mp3') and os.path.exists(downloaded_path):
-                    logging.warning(
-                        "yt-dlp returned a different filename than expected, using it.")
-                    if downloaded_path != final_audio_path:
-                        try:
-                            os.rename(downloaded_path, final_audio_path)
-                            logging.info(
-                                f"Renamed {downloaded_path} to {final_audio_path}")
-                            return final_audio_path
-                        except OSError as rename_err:
-                            logging.error(
-                                f"Failed to rename downloaded file: {rename_err}")
-                            return downloaded_path
-                    else:
-                        return final_audio_path
-                else:
-                    raise SubtitleError(
-                        f"Expected audio file not found after download: {final_audio_path}")
+                info_dict = ydl.extract_info(youtube_url, download=True)
+            final_audio_path = ydl.prepare_filename(info_dict)
+        if not os.path.exists(final_audio_path):
+            raise SubtitleError(
+                f"Expected audio file not found after download: {final_audio_path}")
+        if os.path.splitext(final_audio_path)[1].lower().lstrip('.') not in ALLOWED_FILE_EXTENSIONS:
+            final_audio_path = _convert_audio_to_m4a(final_audio_path)
+        logging.info(
+            f"Audio download and conversion successful: {final_audio_path}")
+        return final_audio_path
 
     except yt_dlp.utils.DownloadError as e:
         logging.error(f"yt-dlp download error: {e}")
@@ -192,35 +368,223 @@ def download_audio(youtube_url, output_dir="."):
         return None
 
 
+_YOUTUBE_RE = re.compile(
+    r'(?:https?:\/\/)?(?:www\.)?'
+    r'(?:youtube\.com\/(?:watch\?v=|embed\/|v\/|shorts\/)|youtu\.be\/)'
+    r'([a-zA-Z0-9_-]{11})'
+    r'(?:\S*)?'
+)
+
+
 def is_youtube_url(url):
     """Checks if the given URL is a valid YouTube URL."""
     if not url or not isinstance(url, str):
         return False
-    youtube_regex = re.compile(
-        r'(?:https?:\/\/)?(?:www\.)?'
-        r'(?:youtube\.com\/(?:watch\?v=|embed\/|v\/|shorts\/)|youtu\.be\/)'
-        r'([a-zA-Z0-9_-]{11})'
-        r'(?:\S*)?'
-    )
-    return bool(youtube_regex.match(url))
+    # The regex is anchored and every match has "youtu" within its first 17 characters, so most clipboard
+    # text, however long, is rejected by scanning a short prefix without running the regex.
+    if "youtu" not in url[:32]:
+        return False
+    return _YOUTUBE_RE.match(url) is not None
+
+
+def youtube_video_id(url):
+    """Returns the 11 character video ID of a YouTube URL, or None."""
+    match = _YOUTUBE_RE.match(url)
+    return match.group(1) if match else None
+
+
+# --- SRT Cache ---
+
+SRT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "groq_sub_gen", "srt")
+
+
+def _srt_cache_path(video_id):
+    # One directory per transcription model, so switching models doesn't serve the old model's subtitles.
+    model = config.whisper_model if config.process_locally else config.model
+    return os.path.join(SRT_CACHE_DIR, re.sub(r'[^\w.-]', '_', model), f"{video_id}.srt")
+
+
+def find_cached_srt(video_id):
+    """Returns the path of the cached SRT for a YouTube video, or None if it isn't cached."""
+    if config.srt_cache_max_mb <= 0:
+        return None
+    cache_path = _srt_cache_path(video_id)
+    try:
+        # Eviction goes by mtime, touching the file marks it as recently used.
+        os.utime(cache_path)
+    except FileNotFoundError:
+        return None
+    return cache_path
+
+
+def store_cached_srt(video_id, srt_path):
+    """Copies a generated SRT into the cache, then trims the cache to config.srt_cache_max_mb."""
+    if config.srt_cache_max_mb <= 0:
+        return
+    cache_path = _srt_cache_path(video_id)
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        shutil.copyfile(srt_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+        _evict_srt_cache(config.srt_cache_max_mb * 1024 * 1024)
+    except OSError as e:
+        logging.warning(f"Could not cache subtitles {srt_path}: {e}")
+
+
+def _evict_srt_cache(max_bytes):
+    """Deletes the least recently used cached SRTs until the cache fits in max_bytes."""
+    entries = []
+    for dir_path, _, file_names in os.walk(SRT_CACHE_DIR):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+# --- Language Cache ---
+
+LANGUAGE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "groq_sub_gen", "languages.json")
+_LANGUAGE_CACHE_MAX = 4096
+_LANGUAGE_CACHE = None
+_LANGUAGE_CACHE_LOCK = threading.Lock()
+
+
+def _load_language_cache():
+    global _LANGUAGE_CACHE
+    if _LANGUAGE_CACHE is None:
+        try:
+            with open(LANGUAGE_CACHE_PATH, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            cache = None
+        # Anything but an object (a corrupted or hand-edited file) is treated like a missing cache.
+        _LANGUAGE_CACHE = cache if isinstance(cache, dict) else {}
+    return _LANGUAGE_CACHE
+
+
+def find_cached_language(video_id):
+    """Returns the language found for the video by an earlier check (in this or a previous run), or None."""
+    with _LANGUAGE_CACHE_LOCK:
+        return _load_language_cache().get(video_id)
+
+
+def store_cached_language(video_id, language):
+    with _LANGUAGE_CACHE_LOCK:
+        cache = _load_language_cache()
+        if cache.get(video_id) == language:
+            return
+        cache.pop(video_id, None)
+        cache[video_id] = language
+        while len(cache) > _LANGUAGE_CACHE_MAX:
+            del cache[next(iter(cache))]
+        tmp_path = f"{LANGUAGE_CACHE_PATH}.tmp"
+        try:
+            os.makedirs(os.path.dirname(LANGUAGE_CACHE_PATH), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(cache, file, separators=(',', ':'))
+            os.replace(tmp_path, LANGUAGE_CACHE_PATH)
+        except OSError as e:
+            logging.debug(f"Could not write language cache {LANGUAGE_CACHE_PATH}: {e}")
+
+
+# Downloads run concurrently, only let one of them prompt the user at a time.
+_PROMPT_LOCK = threading.Lock()
 
 
 def timed_input(prompt, timeout=5):
-    user_input = [None]
+    with _PROMPT_LOCK:
+        return _timed_input(prompt, timeout)
 
-    def get_input():
-        user_input[0] = input(prompt)
 
-    input_thread = threading.Thread(target=get_input)
-    input_thread.start()
-    input_thread.join(timeout)
+# (done event, result) of the stdin reader started by a prompt that timed out. input() can't be cancelled,
+# so the next prompt waits on that reader instead of starting a second one.
+_pending_input = None
 
-    if input_thread.is_alive():
+
+def _start_input_reader():
+    fd = sys.stdin.fileno()
+    encoding = sys.stdin.encoding or 'utf-8'
+    done = threading.Event()
+    user_input = [None]
+
+    def get_input():
+        # Reads the file descriptor instead of calling input(): a daemon thread blocked inside sys.stdin holds
+        # its buffer lock, and the interpreter aborts if it finds that lock taken while shutting down.
+        line = b''
+        try:
+            while not line.endswith(b'\n'):
+                data = os.read(fd, 1024)
+                if not data:
+                    break
+                line += data
+        except OSError:
+            pass
+        finally:
+            if line:
+                user_input[0] = line.decode(encoding, 'replace').rstrip('\r\n')
+            done.set()
+
+    # Daemon, so a prompt nobody answers doesn't keep the process alive on exit.
+    threading.Thread(target=get_input, daemon=True).start()
+    return done, user_input
+
+
+def _timed_input(prompt, timeout):
+    global _pending_input
+    # A line the old reader already got was typed after its prompt timed out, it doesn't answer this one.
+    if _pending_input is None or _pending_input[0].is_set():
+        _pending_input = _start_input_reader()
+
+    done, user_input = _pending_input
+    print(prompt, end='', flush=True)
+    if not done.wait(timeout):
         logging.info("Input timed out.")
         return None
+    _pending_input = None
     return user_input[0]
 
 
+def _captions_suggest_language(info_dict, desired):
+    """
+    Guesses the spoken language from caption tracks already in the metadata: YouTube's speech recognition
+    track of the original audio (`<lang>-orig`), or manual subtitles that are all in the desired language.
+    Plain automatic captions don't count, YouTube offers machine translations of them into every language.
+    """
+    if f"{desired}-orig" in (info_dict.get('automatic_captions') or {}):
+        return True
+    subtitle_languages = {code.split('-')[0] for code in (info_dict.get('subtitles') or {}) if code != 'live_chat'}
+    return subtitle_languages == {desired}
+
+
+# Three letter (ISO 639-2) codes some uploads carry instead of the two letter ones.
+_ISO639_2_CODES = {"jpn": "ja", "eng": "en", "zho": "zh", "chi": "zh", "kor": "ko"}
+
+
+def _language_matches(language, desired):
+    """True if a metadata language ('ja', 'ja-JP', 'jpn', 'Japanese', ...) is the desired language code."""
+    if not language:
+        return False
+    language = language.lower()
+    if language == desired:
+        return True
+    base = language.replace('_', '-').split('-')[0]
+    return (base == desired or _ISO639_2_CODES.get(base) == desired
+            or language == LANGUAGE_FROM_CODE.get(desired, '').lower())
+
+
 def is_language_desired(url, desired='ja'):
     """
     Checks if the YouTube video is in desired language.
@@ -230,27 +594,33 @@ def is_language_desired(url, desired='ja'):
         return True
 
     logging.info("Checking video language...")
-    yt_dlp_ops = {'quiet': True, 'verbose': False}
-    if config.cookies:
-        yt_dlp_ops['cookiesfrombrowser'] = (config.cookies,)
     try:
-        with yt_dlp.YoutubeDL(yt_dlp_ops) as ydl:
-            info_dict = ydl.extract_info(url, download=False)
+        video_id = youtube_video_id(url)
+        language = find_cached_language(video_id) if video_id else None
+        if language is not None:
+            logging.info(f"Video language '{language}' known from an earlier check.")
+        else:
+            info_dict = _extract_info(url)
             # Extract language metadata if available
             language = info_dict.get('language', None)
-            if language == desired:  # 'ja' is the language code for Japanese
+            if language is None and _captions_suggest_language(info_dict, desired):
+                logging.info(f"Video has no language set, but its captions indicate '{desired}'.")
+                language = desired
+            if video_id and language:
+                store_cached_language(video_id, language)
+        if _language_matches(language, desired):
+            return True
+        else:
+            print(
+                f"Video language {language}, does not match desired language '{desired}'.")
+            override = timed_input(
+                "Override language check? Will timeout in 15 seconds. (y/n): ", timeout=15)
+            if override and override.strip().lower() in ['y', 'yes']:
+                logging.info("Language check overridden by user.")
                 return True
             else:
-                print(
-                    f"Video language {language}, does not match desired language '{desired}'.")
-                override = timed_input(
-                    "Override language check? Will timeout in 15 seconds. (y/n): ", timeout=15)
-                if override and override.strip().lower() in ['y', 'yes']:
-                    logging.info("Language check overridden by user.")
-                    return True
-                else:
-                    logging.info("Skipping video due to language mismatch.")
-                return False
+                logging.info("Skipping video due to language mismatch.")
+            return False
     except Exception as e:
         logging.error(f"Error checking video language: {e}", exc_info=True)
         override = timed_input(
@@ -269,16 +639,73 @@ def is_file_path(path):
     path = path.replace('"', "")
     if not path or not isinstance(path, str):
         return False
-    return os.path.isfile(path) and os.path.exists(path)
+    return os.path.isfile(path)
+
+
+# Looked up once; PATH is not expected to change while the app runs.
+FFMPEG_PATH = shutil.which("ffmpeg")
+HAS_FFMPEG = FFMPEG_PATH is not None
+
+
+# Audio codecs that can be stream-copied into a container the transcription
+# backends accept, mapped to that container's extension.
+_COPYABLE_AUDIO_CODECS = {"aac": "m4a", "opus": "webm", "mp3": "mp3"}
+
+
+def probe_streams(path):
+    """Returns ffprobe's descriptions of the streams in path, or an empty list if it can't be probed."""
+    cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_streams", path]
+    try:
+        process = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        return json.loads(process.stdout).get('streams') or []
+    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError) as e:
+        logging.debug(f"Could not probe {path}: {e}")
+        return []
+
+
+def first_audio_stream(streams):
+    """Returns the first audio stream of probe_streams' result, or an empty dict if there is none."""
+    return next((stream for stream in streams if stream.get('codec_type') == 'audio'), {})
+
+
+def _has_video_stream(streams):
+    # Cover art embedded in audio files shows up as a video stream too, but is not video.
+    return any(stream.get('codec_type') == 'video' and not (stream.get('disposition') or {}).get('attached_pic')
+               for stream in streams)
 
 
 def extract_audio_from_local_video(path):
-    """Extracts audio from a local video file."""
+    """Extracts audio from a local video file.
+
+    The audio stream is copied without re-encoding when its codec fits a
+    supported container; otherwise it is re-encoded to mp3.
+    """
     if not is_file_path(path):
         logging.error(f"Invalid file path: {path}")
         return None
+    if not HAS_FFMPEG:
+        logging.error("ffmpeg not found in PATH, cannot extract audio.")
+        return None
 
-    output_audio_path = f"{os.path.splitext(path)[0]}.mp3"
+    base, ext = os.path.splitext(path)
+    streams = probe_streams(path)
+    copy_ext = _COPYABLE_AUDIO_CODECS.get(first_audio_stream(streams).get('codec_name'))
+    if copy_ext:
+        if ext.lower() == f".{copy_ext}" and streams and not _has_video_stream(streams):
+            return path  # Already an audio-only file in the right container.
+        output_audio_path = f"{base}.{copy_ext}"
+        if output_audio_path.lower() == path.lower():
+            # e.g. the Opus track of a .webm video, which can't be remuxed onto itself.
+            output_audio_path = f"{base}.audio.{copy_ext}"
+        try:
+            subprocess.run(["ffmpeg", "-i", path, "-vn", "-c:a", "copy",
+                           "-map", "0:a:0", output_audio_path], check=True)
+            logging.info(f"Audio extracted successfully: {output_audio_path}")
+            return output_audio_path
+        except subprocess.CalledProcessError as e:
+            logging.warning(f"Stream copy failed, re-encoding instead: {e}")
+
+    output_audio_path = f"{base}.mp3"
     try:
         subprocess.run(["ffmpeg", "-i", path, "-q:a", "0",
                        "-map", "a", output_audio_path], check=True)
@@ -307,6 +734,11 @@ class StableTSProcessor:
             ) from exc
 
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if self.device == "cuda":
+            # Let the matmuls/convolutions whisper still runs in FP32 use tensor cores (TF32) as well.
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.backends.cudnn.benchmark = True
 
         try:
             import stable_whisper
@@ -316,7 +748,19 @@ class StableTSProcessor:
                 "Install `asb-auto-subgen[local]` or set `process_locally: false` in config.yaml."
             ) from exc
         try:
-            self.model = stable_whisper.load_model(self.model, device=self.device)
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            faster_whisper = None
+        try:
+            if faster_whisper is not None:
+                # CTranslate2 backend: same stable-ts result objects, several times faster than openai-whisper.
+                compute_type = "int8_float16" if self.device == "cuda" else "int8"
+                self.model = stable_whisper.load_faster_whisper(self.model, device=self.device, compute_type=compute_type)
+                self._transcribe_kwargs = {}
+            else:
+                self.model = stable_whisper.load_model(self.model, device=self.device)
+                # Whisper decodes in FP16 on GPU; say so explicitly so CPU runs skip the FP16 fallback warning.
+                self._transcribe_kwargs = {"fp16": self.device == "cuda"}
         except Exception as e:
             logging.error(f"Failed to load stable-ts model: {e}")
             raise SubtitleError(f"Failed to load stable-ts model: {e}")
@@ -336,6 +780,7 @@ class StableTSProcessor:
                 word_timestamps=True,
                 vad=vad,
                 temperature=0.0,
+                **self._transcribe_kwargs,
                 # Add any extra args if needed
             )
         except Exception as e:
@@ -343,23 +788,25 @@ class StableTSProcessor:
             raise SubtitleError(f"stable-ts transcription failed: {e}")
 
         # Convert to groq-like format
-        segments = []
-        words = []
-        for i, seg in enumerate(result.segments):
-            segments.append({
+        segments = [
+            {
+                "id": i,
+                "start": float(getattr(seg, 'start', 0.0)),
+                "end": float(getattr(seg, 'end', 0.0)),
+                "text": getattr(seg, 'text', ""),
+            }
+            for i, seg in enumerate(result.segments)
+        ]
+        words = [
+            {
                 "id": i,
-                "start": float(seg.start) if hasattr(seg, 'start') else 0.0,
-                "end": float(seg.end) if hasattr(seg, 'end') else 0.0,
-                "text": getattr(seg, 'text', "")
-            })
-            if hasattr(seg, 'words') and seg.words:
-                for w in seg.words:
-                    words.append({
-                        "id": len(words),
-                        "start": float(getattr(w, 'start', 0.0)),
-                        "end": float(getattr(w, 'end', 0.0)),
-                        "word": getattr(w, 'word', getattr(w, 'text', ""))
-                    })
+                "start": float(getattr(w, 'start', 0.0)),
+                "end": float(getattr(w, 'end', 0.0)),
+                # `text` is only read for words that have no `word` attribute.
+                "word": w.word if hasattr(w, 'word') else getattr(w, 'text', ""),
+            }
+            for i, w in enumerate(w for seg in result.segments for w in (getattr(seg, 'words', None) or ()))
+        ]
 
         return {"segments": segments, "words": words}
 
@@ -1,11 +1,16 @@
-import base64
+import asyncio
+import functools
+import glob
+import importlib.util
 import os
 import subprocess
 import json
 import re
 import logging
-import time
-import requests
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import httpx
+import numpy as np
 from groq import Groq # Assuming groq library is installed and used
 
 try:
@@ -18,6 +23,8 @@ except ImportError as e:
     exit(1)
 
 from groq_sub_gen.shared import *
+from groq_sub_gen.constants import LANGUAGE_FROM_CODE, ALLOWED_FILE_EXTENSIONS, MAX_FILE_SIZE_MB, CHUNK_SIZE_MB
+from groq_sub_gen.clipboard_watcher import ClipboardWatcher
 
 # --- Configuration ---
 # Recommended: Load API key from environment variable
@@ -33,32 +40,52 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 # --- Constants (from SubtitleProcessor) ---
 
-LANGUAGE_CODES = {
-    "English": "en", "Chinese": "zh", "German": "de", "Spanish": "es", "Russian": "ru",
-    "Korean": "ko", "French": "fr", "Japanese": "ja", "Portuguese": "pt", "Turkish": "tr",
-    "Polish": "pl", "Catalan": "ca", "Dutch": "nl", "Arabic": "ar", "Swedish": "sv",
-    "Italian": "it", "Indonesian": "id", "Hindi": "hi", "Finnish": "fi", "Vietnamese": "vi",
-    "Hebrew": "he", "Ukrainian": "uk", "Greek": "el", "Malay": "ms", "Czech": "cs",
-    "Romanian": "ro", "Danish": "da", "Hungarian": "hu", "Tamil": "ta", "Norwegian": "no",
-    "Thai": "th", "Urdu": "ur", "Croatian": "hr", "Bulgarian": "bg", "Lithuanian": "lt",
-    "Latin": "la", "Māori": "mi", "Malayalam": "ml", "Welsh": "cy", "Slovak": "sk",
-    "Telugu": "te", "Persian": "fa", "Latvian": "lv", "Bengali": "bn", "Serbian": "sr",
-    "Azerbaijani": "az", "Slovenian": "sl", "Kannada": "kn", "Estonian": "et",
-    "Macedonian": "mk", "Breton": "br", "Basque": "eu", "Icelandic": "is", "Armenian": "hy",
-    "Nepali": "ne", "Mongolian": "mn", "Bosnian": "bs", "Kazakh": "kk", "Albanian": "sq",
-    "Swahili": "sw", "Galician": "gl", "Marathi": "mr", "Panjabi": "pa", "Sinhala": "si",
-    "Khmer": "km", "Shona": "sn", "Yoruba": "yo", "Somali": "so", "Afrikaans": "af",
-    "Occitan": "oc", "Georgian": "ka", "Belarusian": "be", "Tajik": "tg", "Sindhi": "sd",
-    "Gujarati": "gu", "Amharic": "am", "Yiddish": "yi", "Lao": "lo", "Uzbek": "uz",
-    "Faroese": "fo", "Haitian": "ht", "Pashto": "ps", "Turkmen": "tk", "Norwegian Nynorsk": "nn",
-    "Maltese": "mt", "Sanskrit": "sa", "Luxembourgish": "lb", "Burmese": "my", "Tibetan": "bo",
-    "Tagalog": "tl", "Malagasy": "mg", "Assamese": "as", "Tatar": "tt", "Hawaiian": "haw",
-    "Lingala": "ln", "Hausa": "ha", "Bashkir": "ba", "Javanese": "jw", "Sundanese": "su",
-}
-
-ALLOWED_FILE_EXTENSIONS = ["mp3", "mp4", "mpeg", "mpga", "m4a", "wav", "webm"]
-MAX_FILE_SIZE_MB = 25
-CHUNK_SIZE_MB = 25
+_VALID_GRANULARITIES = frozenset({"segment", "word"})
+
+DOWNSAMPLE_BITRATE_KBPS = 128
+MAX_CONCURRENT_UPLOADS = 8
+MAX_CONCURRENT_DOWNLOADS = 4
+
+_JSON_BLOB_RE = re.compile(r'(\{.*\})', re.DOTALL)
+_ORG_ID_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
+
+
+def _censor_org(message):
+    """Replaces Groq organization ids (`org_` followed by letters/digits) with `org_(censored)`."""
+    parts = []
+    pos = 0
+    while (start := message.find('org_', pos)) != -1:
+        end = start + 4
+        while end < len(message) and message[end] in _ORG_ID_CHARS:
+            end += 1
+        if end == start + 4:
+            # Bare "org_" without an id, keep it as is.
+            parts.append(message[pos:end])
+        else:
+            parts.append(message[pos:start])
+            parts.append('org_(censored)')
+        pos = end
+    if not parts:
+        return message
+    parts.append(message[pos:])
+    return ''.join(parts)
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_groq_error_body(json_str):
+    """Parses the JSON body embedded in a Groq error string. Returns None if it can't be parsed."""
+    try:
+        return json.loads(json_str.replace("'", '"'))
+    except json.JSONDecodeError:
+        return None
+
+@functools.lru_cache(maxsize=1 << 16)
+def _format_ms(milliseconds):
+    """Formats integer milliseconds as an SRT timestamp. Cached since word timestamps repeat a lot."""
+    hours, remainder = divmod(milliseconds, 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    seconds, milliseconds = divmod(remainder, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
 
 # --- Custom Exception ---
 class SubtitleError(Exception):
@@ -91,9 +118,10 @@ class SubtitleProcessor:
     def _cleanup_temp_files(self):
         for f in self._temp_files:
             try:
-                if os.path.exists(f):
-                    os.remove(f)
-                    logging.info(f"Cleaned up temporary file: {f}")
+                os.remove(f)
+                logging.info(f"Cleaned up temporary file: {f}")
+            except FileNotFoundError:
+                pass
             except OSError as e:
                 logging.warning(f"Could not remove temporary file {f}: {e}")
         self._temp_files = []
@@ -103,16 +131,15 @@ class SubtitleProcessor:
             error_data = e.args[0]
             error_message = f"Groq API Error ({type(e).__name__}) with model {model_name}"
             if isinstance(error_data, str):
-                json_match = re.search(r'(\{.*\})', error_data)
+                json_match = _JSON_BLOB_RE.search(error_data)
                 if json_match:
-                    try:
-                        json_str = json_match.group(1).replace("'", '"')
-                        error_data = json.loads(json_str)
-                    except json.JSONDecodeError: error_message += f": Could not parse error details: {error_data}"
+                    parsed = _parse_groq_error_body(json_match.group(1))
+                    if parsed is not None: error_data = parsed
+                    else: error_message += f": Could not parse error details: {error_data}"
                 else: error_message += f": {error_data}"
             if isinstance(error_data, dict) and 'error' in error_data and 'message' in error_data['error']:
                  api_msg = error_data['error']['message']
-                 api_msg = re.sub(r'org_[a-zA-Z0-9]+', 'org_(censored)', api_msg)
+                 api_msg = _censor_org(api_msg)
                  error_message += f": {api_msg}"
             elif isinstance(error_data, str) and not json_match: error_message += f": {error_data}"
         except Exception as parse_exc:
@@ -120,64 +147,49 @@ class SubtitleProcessor:
             error_message = f"Unknown Groq API error occurred: {e}"
         raise SubtitleError(error_message) from e
 
-    def _split_audio(self, input_file_path, chunk_size_mb):
-        chunk_size = int(chunk_size_mb * 1024 * 1024)
-        file_number = 1
-        chunks = []
+    def _split_audio(self, input_file_path, chunk_size_mb, bitrate_kbps=DOWNSAMPLE_BITRATE_KBPS):
+        # Segment on frame boundaries so every chunk is a valid file on its own.
+        # Leave some headroom under the size limit since the bitrate is only nominal.
+        segment_seconds = max(1, int(chunk_size_mb * 1024 * 1024 * 8 * 0.95 / (bitrate_kbps * 1000)))
         base_name, extension = os.path.splitext(input_file_path)
+        cmd = ["ffmpeg", "-y", "-i", input_file_path, "-f", "segment", "-segment_time", str(segment_seconds),
+               "-segment_start_number", "1", "-reset_timestamps", "1", "-c", "copy", f"{base_name}_part%03d{extension}"]
         try:
-            with open(input_file_path, 'rb') as f:
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk: break
-                    chunk_name = f"{base_name}_part{file_number:03}{extension}"
-                    with open(chunk_name, 'wb') as chunk_file: chunk_file.write(chunk)
-                    chunks.append(chunk_name)
-                    self._temp_files.append(chunk_name)
-                    file_number += 1
-            if not chunks: raise SubtitleError(f"No chunks created from {input_file_path}.")
-            logging.info(f"Split {input_file_path} into {len(chunks)} chunks.")
-            return chunks
-        except IOError as e: raise SubtitleError(f"Error splitting file {input_file_path}: {e}") from e
-
-    def _merge_files(self, chunks, output_file_path):
-        if not chunks: return
-        list_file_path = "temp_ffmpeg_list.txt"
-        try:
-            with open(list_file_path, "w", encoding='utf-8') as f:
-                for file in chunks:
-                    safe_file_path = file.replace("'", "'\\''")
-                    f.write(f"file '{safe_file_path}'\n")
-            self._temp_files.append(list_file_path)
-            cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file_path, "-c", "copy", output_file_path]
             self._run_command(cmd)
-            logging.info(f"Successfully merged {len(chunks)} chunks into {output_file_path}")
-        except Exception as e:
-            logging.error(f"Error during file merging: {e}")
-            try:
-                 if os.path.exists(list_file_path): os.remove(list_file_path)
-            except OSError: logging.warning(f"Could not remove temp list file: {list_file_path}")
-            raise SubtitleError(f"Failed to merge files into {output_file_path}") from e
         finally:
-             if list_file_path not in self._temp_files: self._temp_files.append(list_file_path)
+            chunks = sorted(glob.glob(f"{glob.escape(base_name)}_part[0-9][0-9][0-9]{glob.escape(extension)}"))
+            self._temp_files.extend(chunks)
+        if not chunks: raise SubtitleError(f"No chunks created from {input_file_path}.")
+        logging.info(f"Split {input_file_path} into {len(chunks)} chunks of up to {segment_seconds}s.")
+        return chunks
 
     def _check_and_prepare_file(self, input_file_path, split=False):
-        if not input_file_path or not os.path.exists(input_file_path):
+        if not input_file_path:
             raise FileNotFoundError(f"Input file not found: {input_file_path}")
-        try: file_size_mb = os.path.getsize(input_file_path) / (1024 * 1024)
+        try: file_size_mb = os.stat(input_file_path).st_size / (1024 * 1024)
+        except FileNotFoundError as e: raise FileNotFoundError(f"Input file not found: {input_file_path}") from e
         except OSError as e: raise SubtitleError(f"Could not get size of file {input_file_path}: {e}") from e
+        if not split:
+            return input_file_path, None  # No processing needed if not splitting, whisper decodes anything ffmpeg can
         file_extension = os.path.splitext(input_file_path)[1].lower().lstrip('.')
         if file_extension not in ALLOWED_FILE_EXTENSIONS:
             raise ValueError(f"Invalid file type (.{file_extension}). Allowed: {', '.join(ALLOWED_FILE_EXTENSIONS)}")
-        if not split:
-            return input_file_path, None  # No processing needed if not splitting
         
         if file_size_mb <= MAX_FILE_SIZE_MB:
             logging.info(f"File '{os.path.basename(input_file_path)}' ({file_size_mb:.2f} MB) within size limit.")
             return input_file_path, None
+        stream = first_audio_stream(probe_streams(input_file_path))
+        bit_rate = int(stream.get('bit_rate') or 0)
+        if (stream.get('codec_name') == "mp3" and int(stream.get('sample_rate') or 0) <= 16000
+                and stream.get('channels') == 1 and 0 < bit_rate <= DOWNSAMPLE_BITRATE_KBPS * 1000):
+            logging.warning(f"File ({file_size_mb:.2f} MB) > limit ({MAX_FILE_SIZE_MB} MB) but already downsampled. Splitting into {CHUNK_SIZE_MB} MB chunks.")
+            try:
+                return self._split_audio(input_file_path, CHUNK_SIZE_MB, bitrate_kbps=bit_rate / 1000), "split"
+            except (OSError, SubtitleError) as e:
+                raise SubtitleError(f"Error during file preparation: {e}") from e
         logging.warning(f"File ({file_size_mb:.2f} MB) > limit ({MAX_FILE_SIZE_MB} MB). Attempting downsample.")
         output_file_path = os.path.splitext(input_file_path)[0] + "_downsampled.mp3"
-        cmd = ["ffmpeg", "-y", "-i", input_file_path, "-ar", "16000", "-ab", "128k", "-ac", "1", "-f", "mp3", output_file_path]
+        cmd = ["ffmpeg", "-y", "-i", input_file_path, "-ar", "16000", "-ab", f"{DOWNSAMPLE_BITRATE_KBPS}k", "-ac", "1", "-f", "mp3", output_file_path]
         try:
             self._run_command(cmd)
             self._temp_files.append(output_file_path)
@@ -194,40 +206,89 @@ class SubtitleProcessor:
 
     @staticmethod
     def _format_time(seconds_float):
-        total_seconds = int(seconds_float)
-        milliseconds = int(round((seconds_float - total_seconds) * 1000))
-        hours, remainder = divmod(total_seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+        return _format_ms(int(round(seconds_float * 1000)))
+
+    @staticmethod
+    def _format_times(seconds_array):
+        """Vectorized `_format_time` over an array of seconds, returns a list of SRT timestamps."""
+        milliseconds = np.rint(np.asarray(seconds_array, dtype=np.float64) * 1000).astype(np.int64)
+        return [_format_ms(ms) for ms in milliseconds.tolist()]
+
+    @staticmethod
+    def _write_srt_entries(out, srt_entries):
+        """Writes SRT entries into out, separated by a blank line from each other and anything already written."""
+        write = out.write
+        separator = '\n' if out.tell() else ''
+        for srt_entry in srt_entries:
+            write(separator)
+            write(srt_entry)
+            separator = '\n'
 
     @staticmethod
-    def _json_to_srt(transcription_json_segments):
-        srt_lines = []
-        for segment in transcription_json_segments:
-            start_time = SubtitleProcessor._format_time(segment.get('start', 0.0))
-            end_time = SubtitleProcessor._format_time(segment.get('end', 0.0))
-            text = segment.get('text', '').strip()
-            srt_lines.append(f"{segment.get('id', -1) + 1}\n{start_time} --> {end_time}\n{text}\n")
-        return '\n'.join(srt_lines)
+    def _entry_arrays(entries, text_key):
+        """Splits transcription entries into (ids, starts, ends, texts). Starts and ends are float64 arrays."""
+        count = len(entries)
+        # Entries are either all dicts or all SDK objects, so pick the accessor once for the whole list.
+        if isinstance(entries[0], dict):
+            ids = [entry.get('id', -1) for entry in entries]
+            starts = np.fromiter((entry.get('start', 0.0) for entry in entries), dtype=np.float64, count=count)
+            ends = np.fromiter((entry.get('end', 0.0) for entry in entries), dtype=np.float64, count=count)
+            texts = [entry.get(text_key, '') for entry in entries]
+        else:
+            ids = [getattr(entry, 'id', -1) for entry in entries]
+            starts = np.fromiter((getattr(entry, 'start', 0.0) for entry in entries), dtype=np.float64, count=count)
+            ends = np.fromiter((getattr(entry, 'end', 0.0) for entry in entries), dtype=np.float64, count=count)
+            texts = [getattr(entry, text_key, '') for entry in entries]
+        return ids, starts, ends, texts
+
+    @staticmethod
+    def _timed_entries_to_srt(srt_ids, starts, ends, texts, *, out):
+        start_times = SubtitleProcessor._format_times(starts)
+        end_times = SubtitleProcessor._format_times(ends)
+        SubtitleProcessor._write_srt_entries(out, (
+            f"{srt_id}\n{start_time} --> {end_time}\n{text.strip()}\n"
+            for srt_id, text, start_time, end_time in zip(srt_ids, texts, start_times, end_times)
+        ))
 
     @staticmethod
-    def _words_json_to_srt(words_data, starting_id=0):
-        srt_lines = []
-        previous_end_time = 0.0
+    def _words_to_srt(starts, ends, texts, *, out, starting_id=0):
+        """Writes word entries given as parallel start/end arrays and a text list. Clamps starts/ends in place."""
+        count = len(texts)
+        if not count: return
         min_duration = 0.050
-        for i, word_entry_obj in enumerate(words_data):
-            word_entry = word_entry_obj if isinstance(word_entry_obj, dict) else word_entry_obj.__dict__
-            start_seconds = word_entry.get('start', 0.0)
-            end_seconds = word_entry.get('end', 0.0)
-            text = word_entry.get('word', '').strip()
-            start_seconds = max(start_seconds, previous_end_time)
-            if end_seconds <= start_seconds: end_seconds = start_seconds + min_duration
-            start_time_fmt = SubtitleProcessor._format_time(start_seconds)
-            end_time_fmt = SubtitleProcessor._format_time(end_seconds)
-            srt_id = starting_id + i + 1
-            srt_lines.append(f"{srt_id}\n{start_time_fmt} --> {end_time_fmt}\n{text}\n")
-            previous_end_time = end_seconds
-        return '\n'.join(srt_lines)
+        # Words may not overlap the previous word and must last at least min_duration.
+        # The min_duration bump makes this a recurrence rather than a running max, so only walk it
+        # when the timestamps actually need fixing (well-formed output skips this entirely).
+        if starts[0] < 0.0 or np.any(ends <= starts) or np.any(starts[1:] < ends[:-1]):
+            previous_end_time = 0.0
+            for i in range(count):
+                start_seconds = max(starts[i], previous_end_time)
+                end_seconds = ends[i] if ends[i] > start_seconds else start_seconds + min_duration
+                starts[i], ends[i] = start_seconds, end_seconds
+                previous_end_time = end_seconds
+        SubtitleProcessor._timed_entries_to_srt(range(starting_id + 1, starting_id + count + 1), starts, ends, texts, out=out)
+
+    def _transcription_request(self, model, prompt, timestamp_granularities_list, language, auto_detect_language, primary_granularity):
+        """Binds the loop-invariant transcription arguments once, leaving only the audio to pass per chunk."""
+        if self.local_processor:
+            return functools.partial(
+                self.local_processor.get_audio_segments, language=language, word_timestamps=(primary_granularity == "word"),
+            )
+        return functools.partial(
+            self.client.audio.transcriptions.create,
+            model=model, prompt=prompt, response_format="verbose_json",
+            timestamp_granularities=timestamp_granularities_list,
+            language=None if auto_detect_language else language, temperature=0.0,
+        )
+
+    def _transcribe_one(self, file_path, transcribe):
+        if self.local_processor:
+            transcription_response = transcribe(file_path)
+        else:
+            with open(file_path, "rb") as file_data:
+                transcription_response = transcribe(file=(os.path.basename(file_path), file_data))
+        # Normalize to a dict for both local and remote.
+        return dict(transcription_response)
 
     def generate_subtitles(
         self,
@@ -249,15 +310,15 @@ class SubtitleProcessor:
         processed_path_or_chunks = None
 
         try:
-            if not auto_detect_language and language not in LANGUAGE_CODES.values():
+            if not auto_detect_language and language not in LANGUAGE_FROM_CODE:
                  raise ValueError(f"Invalid language code '{language}'. Check LANGUAGE_CODES.")
+            logging.info("Auto-detecting language." if auto_detect_language else f"Transcribing as {LANGUAGE_FROM_CODE[language]} ({language}).")
             # Skip font validation if not embedding video
             # ...
         
             processed_path_or_chunks, status = self._check_and_prepare_file(input_file_path, split=self.local_processor is None)
             is_split = (status == "split")
 
-            full_srt_content_list = []
             total_duration_offset = 0.0
             srt_entry_offset = 0
 
@@ -265,97 +326,83 @@ class SubtitleProcessor:
             # input_is_video = input_file_path.lower().endswith((".mp4", ".webm", ".mov")) # Less relevant now
 
             timestamp_granularities_list = [gran.strip() for gran in timestamp_granularities_str.split(',') if gran.strip()]
-            if not timestamp_granularities_list or not all(g in ["segment", "word"] for g in timestamp_granularities_list):
+            if not timestamp_granularities_list or not all(g in _VALID_GRANULARITIES for g in timestamp_granularities_list):
                 raise ValueError("Invalid timestamp_granularities_str. Use 'segment', 'word', or 'segment,word'.")
             primary_granularity = "word" if "word" in timestamp_granularities_list else "segment"
             logging.info(f"Using primary timestamp granularity: {primary_granularity}")
 
-            for i, current_file_path in enumerate(files_to_process):
-                logging.info(f"Processing {'chunk' if is_split else 'file'} {i + 1}/{len(files_to_process)}: {os.path.basename(current_file_path)}")
-                chunk_srt_content = ""
-                try:
-                    with open(current_file_path, "rb") as file_data:
-                        if not self.local_processor:
-                            transcription_response = self.client.audio.transcriptions.create(
-                                file=(os.path.basename(current_file_path), file_data.read()),
-                                model=model, prompt=prompt, response_format="verbose_json",
-                                timestamp_granularities=timestamp_granularities_list,
-                                language=None if auto_detect_language else language, temperature=0.0,
-                            )
-                        else: 
-                            transcription_response = self.local_processor.get_audio_segments(
-                            current_file_path, language=language, word_timestamps=(primary_granularity == "word"),
-                        )
+            transcribe = self._transcription_request(
+                model, prompt, timestamp_granularities_list, language, auto_detect_language, primary_granularity,
+            )
+            # Transcription is network-bound for Groq, so chunks are uploaded concurrently.
+            # The local model is shared and not thread-safe, so it runs one chunk at a time.
+            max_workers = 1 if self.local_processor else min(len(files_to_process), MAX_CONCURRENT_UPLOADS)
+            try:
+                srt_file = open(output_srt_path, "w", encoding="utf-8")
+            except IOError as e:
+                raise SubtitleError(f"Failed to open SRT file {output_srt_path} for writing: {e}") from e
+            try:
+                # The local model runs on the calling thread: executor workers are joined at interpreter exit,
+                # so a transcription running on one would hold up Ctrl+C until it finished.
+                executor = _InlineExecutor() if self.local_processor else ThreadPoolExecutor(max_workers=max_workers)
+                with srt_file, executor:
+                    futures = [executor.submit(self._transcribe_one, current_file_path, transcribe) for current_file_path in files_to_process]
+                    for i, (current_file_path, future) in enumerate(zip(files_to_process, futures)):
+                        logging.info(f"Processing {'chunk' if is_split else 'file'} {i + 1}/{len(files_to_process)}: {os.path.basename(current_file_path)}")
+                        chunk_start = srt_file.tell()
+                        try:
+                            transcription_response = future.result()
+                            word_data = getattr(transcription_response, 'words', transcription_response.get('words', []))
+                            segment_data = getattr(transcription_response, 'segments', transcription_response.get('segments', []))
                             
-                    # Normalize to a dict for both local and remote.
-                    transcription_response = dict(transcription_response)
-                    word_data = getattr(transcription_response, 'words', transcription_response.get('words', []))
-                    segment_data = getattr(transcription_response, 'segments', transcription_response.get('segments', []))
-                    
-                    if primary_granularity == "word":
-                        if word_data:
-                            adjusted_word_data = []
-                            last_end_time_in_chunk = 0.0
-                            for entry_obj in word_data:
-                                entry = entry_obj if isinstance(entry_obj, dict) else entry_obj.__dict__
-                                adjusted_entry = entry.copy()
-                                start = adjusted_entry.get('start', 0.0)
-                                end = adjusted_entry.get('end', 0.0)
-                                adjusted_entry['start'] = start + total_duration_offset
-                                adjusted_entry['end'] = end + total_duration_offset
-                                last_end_time_in_chunk = max(last_end_time_in_chunk, adjusted_entry['end'])
-                                adjusted_word_data.append(adjusted_entry)
-                            chunk_srt_content = self._words_json_to_srt(adjusted_word_data, srt_entry_offset)
-                            total_duration_offset = last_end_time_in_chunk # Update offset based on max end time in this chunk
-                            srt_entry_offset += len(word_data)
-                        else: logging.warning(f"API returned no word timestamps for {os.path.basename(current_file_path)}.")
-
-                    elif primary_granularity == "segment":
-                         if segment_data:
-                            adjusted_segment_data = []
-                            max_original_id = -1
-                            last_end_time_in_chunk = 0.0
-                            for entry_obj in segment_data:
-                                entry = entry_obj if isinstance(entry_obj, dict) else entry_obj.__dict__
-                                adjusted_entry = entry.copy()
-                                start = adjusted_entry.get('start', 0.0)
-                                end = adjusted_entry.get('end', 0.0)
-                                adjusted_entry['start'] = start + total_duration_offset
-                                adjusted_entry['end'] = end + total_duration_offset
-                                last_end_time_in_chunk = max(last_end_time_in_chunk, adjusted_entry['end'])
-                                original_id = entry.get('id', -1)
-                                max_original_id = max(max_original_id, original_id)
-                                adjusted_entry['id'] = original_id # Keep for offset calc
-                                adjusted_segment_data.append(adjusted_entry)
-                            # Adjust IDs sequentially for SRT generation
-                            for j, entry in enumerate(adjusted_segment_data): entry['id'] = srt_entry_offset + j
-                            chunk_srt_content = self._json_to_srt(adjusted_segment_data)
-                            total_duration_offset = last_end_time_in_chunk # Update offset
-                            srt_entry_offset += (max_original_id + 1)
-                         else: logging.warning(f"API returned no segment timestamps for {os.path.basename(current_file_path)}.")
-
-                    if chunk_srt_content:
-                        full_srt_content_list.append(chunk_srt_content)
-
-                except groq.AuthenticationError as e: self._handle_groq_error(e, model)
-                except groq.RateLimitError as e: self._handle_groq_error(e, model)
-                except Exception as e:
-                    logging.error(f"Error processing {os.path.basename(current_file_path)}: {e}", exc_info=True)
-                    logging.warning(f"Skipping chunk {i+1} due to error.")
-                    continue
-
-            if not full_srt_content_list:
+                            if primary_granularity == "word":
+                                if word_data:
+                                    _, starts, ends, texts = self._entry_arrays(word_data, 'word')
+                                    starts += total_duration_offset
+                                    ends += total_duration_offset
+                                    last_end_time_in_chunk = max(0.0, float(ends.max()))
+                                    self._words_to_srt(starts, ends, texts, out=srt_file, starting_id=srt_entry_offset)
+                                    total_duration_offset = last_end_time_in_chunk # Update offset based on max end time in this chunk
+                                    srt_entry_offset += len(word_data)
+                                else: logging.warning(f"API returned no word timestamps for {os.path.basename(current_file_path)}.")
+
+                            elif primary_granularity == "segment":
+                                 if segment_data:
+                                    ids, starts, ends, texts = self._entry_arrays(segment_data, 'text')
+                                    starts += total_duration_offset
+                                    ends += total_duration_offset
+                                    max_original_id = max(-1, max(ids))
+                                    last_end_time_in_chunk = max(0.0, float(ends.max()))
+                                    # IDs are renumbered sequentially for SRT generation
+                                    srt_ids = range(srt_entry_offset + 1, srt_entry_offset + len(texts) + 1)
+                                    self._timed_entries_to_srt(srt_ids, starts, ends, texts, out=srt_file)
+                                    total_duration_offset = last_end_time_in_chunk # Update offset
+                                    srt_entry_offset += (max_original_id + 1)
+                                 else: logging.warning(f"API returned no segment timestamps for {os.path.basename(current_file_path)}.")
+
+                        except (groq.AuthenticationError, groq.RateLimitError) as e:
+                            for pending in futures: pending.cancel()
+                            self._handle_groq_error(e, model)
+                        except Exception as e:
+                            # Drop anything this chunk already wrote before failing.
+                            srt_file.seek(chunk_start)
+                            srt_file.truncate()
+                            logging.error(f"Error processing {os.path.basename(current_file_path)}: {e}", exc_info=True)
+                            logging.warning(f"Skipping chunk {i+1} due to error.")
+                            continue
+                    wrote_subtitles = srt_file.tell() > 0
+            except BaseException:
+                # Don't leave a partially written SRT behind.
+                self._temp_files.append(output_srt_path)
+                raise
+
+            if not wrote_subtitles:
                 logging.warning("No subtitle content was generated.")
+                self._temp_files.append(output_srt_path)
                 self._cleanup_temp_files()
                 return None, None # Return None for SRT path
 
-            final_srt_content = "\n".join(full_srt_content_list)
-            try:
-                with open(output_srt_path, "w", encoding="utf-8") as f:
-                    f.write(final_srt_content)
-                logging.info(f"Successfully generated SRT file: {output_srt_path}")
-            except IOError as e:
-                raise SubtitleError(f"Failed to write final SRT file to {output_srt_path}: {e}") from e
+            logging.info(f"Successfully generated SRT file: {output_srt_path}")
 
             # Video embedding part is skipped as include_video=False implicitly for YT audio
             final_video_output = None
@@ -374,80 +421,196 @@ class SubtitleProcessor:
     # _embed_subtitles method is omitted as it's not used in this workflow
 
 
+class _InlineExecutor:
+    """Minimal stand-in for ThreadPoolExecutor that runs each submitted call right away on the calling thread."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _run_in_daemon_thread(func, *args):
+    """
+    Like asyncio.to_thread, but on a daemon thread. asyncio.run waits for the default executor's threads
+    when it shuts down, so Ctrl+C would otherwise hang until the current download or transcription is done.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def set_outcome(method, value):
+        if not future.done():
+            getattr(future, method)(value)
+
+    def run():
+        try:
+            outcome = ('set_result', func(*args))
+        except BaseException as e:
+            outcome = ('set_exception', e)
+        try:
+            loop.call_soon_threadsafe(set_outcome, *outcome)
+        except RuntimeError:
+            pass  # The event loop already closed, nobody is waiting for the result.
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _create_groq_http_client():
+    """One pooled, keep-alive client shared by every upload. HTTP/2 is used when the optional `h2` package is installed."""
+    return groq.DefaultHttpxClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+    )
+
+
 async def main():
     try:
-        groq_client = Groq(api_key=config.GROQ_API_KEY)
+        groq_client = Groq(api_key=config.GROQ_API_KEY, http_client=_create_groq_http_client())
         if config.process_locally:
             logging.info("Processing subtitles locally.")
-            processor = SubtitleProcessor(
-                local_processor=StableTSProcessor(model=config.whisper_model)
+            # Loading the Whisper model takes seconds, so it loads in the background while the first links
+            # are already being downloaded. The subtitle stage waits for it before its first transcription.
+            processor_future = _run_in_daemon_thread(
+                lambda: SubtitleProcessor(local_processor=StableTSProcessor(model=config.whisper_model))
             )
         else:
             if not config.GROQ_API_KEY:
                 logging.error("GROQ_API_KEY not set. Cannot proceed.")
                 return
-            processor = SubtitleProcessor(groq_client=groq_client)
+            processor_future = asyncio.get_running_loop().create_future()
+            processor_future.set_result(SubtitleProcessor(groq_client=groq_client))
         logging.info("Groq client initialized.")
     except Exception as e:
         logging.error(f"Failed to initialize subtitle processing: {e}")
         return
 
-    previous_clipboard_content = ""
     logging.info("Monitoring clipboard for YouTube links... (Press Ctrl+C to stop)")
 
+    # Download/extract, transcribe and send run as separate stages, so the next links can already be
+    # downloading (several at a time) while the previous one is still being transcribed.
+    clipboard_queue = asyncio.Queue()
+    audio_queue = asyncio.Queue()
+    srt_queue = asyncio.Queue()
+    clipboard_task = asyncio.create_task(_clipboard_stage(clipboard_queue))
+    subtitle_task = asyncio.create_task(_subtitle_stage(processor_future, audio_queue, srt_queue))
+    workers = [
+        clipboard_task,
+        *(asyncio.create_task(_audio_stage(clipboard_queue, audio_queue, srt_queue)) for _ in range(MAX_CONCURRENT_DOWNLOADS)),
+        subtitle_task,
+        asyncio.create_task(_send_stage(srt_queue)),
+    ]
+
+    try:
+        # The subtitle stage only returns if the processor failed to load, the clipboard stage only on an error.
+        await asyncio.wait([clipboard_task, subtitle_task], return_when=asyncio.FIRST_COMPLETED)
+        if clipboard_task.done() and (clipboard_err := clipboard_task.exception()):
+            logging.error(f"Clipboard monitoring failed: {clipboard_err}", exc_info=clipboard_err)
+    except asyncio.CancelledError:
+        logging.info("Stopping clipboard monitoring.")
+        raise
+    finally:
+        processor_future.cancel()
+        for worker in workers:
+            worker.cancel()
+
+
+async def _clipboard_stage(outbox):
+    async for current_clipboard_content in ClipboardWatcher():
+        outbox.put_nowait(current_clipboard_content)
+
+
+async def _audio_stage(inbox, outbox, srt_outbox):
+    """
+    Turns clipboard contents into audio files, queued as (path, remove_after_use, youtube_video_id).
+    YouTube videos that already have cached subtitles skip straight to `srt_outbox`.
+    """
     while True:
+        current_clipboard_content = await inbox.get()
         try:
-            current_clipboard_content = pyperclip.paste()
-            if current_clipboard_content != previous_clipboard_content and current_clipboard_content:
-                previous_clipboard_content = current_clipboard_content
-                if is_youtube_url(current_clipboard_content):
-                    logging.info(f"Detected YouTube link: {current_clipboard_content}")
-                    if is_language_desired(current_clipboard_content, 'ja'):
-                        audio_file_path = None
-                        try:
-                            audio_file_path = download_audio(current_clipboard_content, OUTPUT_DIR)
-
-                            if audio_file_path and os.path.exists(audio_file_path):
-                                logging.info(f"Audio downloaded to: {audio_file_path}")
-                                get_subs(processor, audio_file_path)
-
-                            else:
-                                logging.error("Audio download failed or file not found.")
-
-                        finally:
-                            if audio_file_path and os.path.exists(audio_file_path):
-                                try:
-                                    os.remove(audio_file_path)
-                                    logging.info(f"Cleaned up downloaded audio file: {audio_file_path}")
-                                except OSError as e:
-                                    logging.warning(f"Could not remove downloaded audio file {audio_file_path}: {e}")
-                elif is_file_path(current_clipboard_content):
-                    path = current_clipboard_content.strip().replace('"', '').replace("'", "")
-                    try:
-                        audio = extract_audio_from_local_video(path)
-                    except Exception as e:
-                        logging.error(f"Error extracting audio from local video: {e}")
-                        return
-                    
-                    if audio and os.path.exists(audio):
-                        get_subs(processor, audio)
-                        logging.info(f"Audio extracted from local video: {audio}")
+            if is_youtube_url(current_clipboard_content):
+                logging.info(f"Detected YouTube link: {current_clipboard_content}")
+                video_id = youtube_video_id(current_clipboard_content)
+                cached_srt_path = find_cached_srt(video_id)
+                if cached_srt_path:
+                    logging.info(f"Using cached subtitles: {cached_srt_path}")
+                    srt_outbox.put_nowait(cached_srt_path)
+                    continue
+                if await _run_in_daemon_thread(is_language_desired, current_clipboard_content, 'ja'):
+                    audio_file_path = await _run_in_daemon_thread(download_audio, current_clipboard_content, OUTPUT_DIR)
+                    # download_audio only returns paths it has just checked exist.
+                    if audio_file_path:
+                        logging.info(f"Audio downloaded to: {audio_file_path}")
+                        outbox.put_nowait((audio_file_path, True, video_id))
                     else:
-                        logging.error("Audio extraction failed.")
-                        return
-            time.sleep(1)
-
-        except pyperclip.PyperclipException as clip_err:
-            logging.warning(f"Could not access clipboard: {clip_err}. Retrying...")
-            time.sleep(5)
-        except KeyboardInterrupt:
-            logging.info("Stopping clipboard monitoring.")
-            break
+                        logging.error("Audio download failed or file not found.")
+            elif is_file_path(current_clipboard_content):
+                path = current_clipboard_content.strip().replace('"', '').replace("'", "")
+                if config.process_locally:
+                    # Whisper streams the audio track out of the video through ffmpeg as PCM itself, an
+                    # extracted mp3 would only add an encode, a decode and a temporary file.
+                    outbox.put_nowait((path, False, None))
+                    continue
+                try:
+                    audio = await _run_in_daemon_thread(extract_audio_from_local_video, path)
+                except Exception as e:
+                    logging.error(f"Error extracting audio from local video: {e}")
+                    continue
+
+                if audio:
+                    logging.info(f"Audio extracted from local video: {audio}")
+                    outbox.put_nowait((audio, False, None))
+                else:
+                    logging.error("Audio extraction failed.")
         except Exception as loop_err:
             logging.error(f"Error in main loop: {loop_err}", exc_info=True)
-            time.sleep(5)
+        finally:
+            inbox.task_done()
 
-def get_subs(processor, audio_file_path):
+
+async def _subtitle_stage(processor_future, inbox, outbox):
+    """Transcribes queued audio files one at a time and queues the resulting SRT paths."""
+    try:
+        processor = await processor_future
+    except Exception as e:
+        logging.error(f"Failed to initialize subtitle processing: {e}")
+        return
+    while True:
+        audio_file_path, remove_after_use, video_id = await inbox.get()
+        try:
+            srt_path = await _run_in_daemon_thread(generate_srt, processor, audio_file_path)
+            if srt_path:
+                outbox.put_nowait(srt_path)
+                if video_id:
+                    await _run_in_daemon_thread(store_cached_srt, video_id, srt_path)
+        finally:
+            if remove_after_use:
+                release_downloaded_audio(audio_file_path)
+            inbox.task_done()
+
+
+async def _send_stage(inbox):
+    while True:
+        srt_path = await inbox.get()
+        try:
+            await _run_in_daemon_thread(send_subtitles_http, srt_path)
+        except Exception as send_err:
+            logging.error(f"Error sending subtitles: {send_err}", exc_info=True)
+        finally:
+            inbox.task_done()
+
+
+def generate_srt(processor, audio_file_path):
+        """Generates the SRT in OUTPUT_DIR and returns its path, or None if generation failed."""
         processor: SubtitleProcessor
         base_filename = os.path.splitext(os.path.basename(audio_file_path))[0]
         output_srt_path = os.path.join(OUTPUT_DIR, f"{base_filename}.srt")
@@ -463,14 +626,39 @@ def get_subs(processor, audio_file_path):
                                         )
             if srt_path:
                 logging.info(f"Subtitles generated successfully: {srt_path}")
-                send_subtitles_http(srt_path)
-            else:
-                logging.error("Subtitle generation failed (returned None).")
+                return srt_path
+            logging.error("Subtitle generation failed (returned None).")
 
         except (SubtitleError, ValueError, groq.GroqError) as sub_err:
             logging.error(f"Error during subtitle generation: {sub_err}")
         except Exception as gen_err:
             logging.error(f"Unexpected error during subtitle generation: {gen_err}", exc_info=True)
+        return None
+
+
+def get_subs(processor, audio_file_path):
+    srt_path = generate_srt(processor, audio_file_path)
+    if srt_path:
+        send_subtitles_http(srt_path)
+
+async def check_ffmpeg():
+    """
+    Warns if ffmpeg is not on PATH. Only actually runs `ffmpeg -version` when debug logging is on.
+    Async so it can run alongside the other startup checks.
+    """
+    if HAS_FFMPEG and not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return True
+    if HAS_FFMPEG:
+        process = await asyncio.create_subprocess_exec(
+            FFMPEG_PATH, "-version", stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        stdout, _ = await process.communicate()
+        if process.returncode == 0:
+            logging.debug(f"Using {FFMPEG_PATH}: {stdout.decode(errors='replace').splitlines()[0]}")
+            return True
+    print("Warning: ffmpeg command not found or failed execution.")
+    print("         Ensure ffmpeg is installed and in your system's PATH for audio extraction/conversion.")
+    return False
 
 def test_send():
     send_subtitles_http("Hipe5_osY-k.srt")
@@ -478,13 +666,12 @@ def test_send():
 if __name__ == "__main__":
 
 
-    try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("Warning: ffmpeg command not found or failed execution.")
-        print("         Ensure ffmpeg is installed and in your system's PATH for audio extraction/conversion.")
+    asyncio.run(check_ffmpeg())
 
     # test_send()
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass  # main() already logged that monitoring stopped.
 
     # End of the main.py script